@@ -1,20 +1,20 @@
+import asyncio
+import threading
 import time
 from paymob.exceptions import AuthenticationError
 import logging
 from paymob.cache import CacheBackend, MemoryCache
-from paymob.connection import ConnectionPool
+from paymob.connection import AsyncConnectionPool, ConnectionPool
 from paymob.config import PaymobConfig
 
 logger = logging.getLogger(__name__)
 
 
-class PaymobAuth:
+class _BasePaymobAuth:
     """
-    Paymob requires a 1-hr expired token for some requests.
-    This class handles token request, caching, and refreshing.
-
-    PaymobAuth.get_token() returns the token.
-    PaymobAuth.invalidate_token() removes the token from cache.
+    Token caching shared by PaymobAuth and PaymobAsyncAuth: the process-local
+    memo, the cache backend, refresh tracking and invalidation.
+    Subclasses provide get_token(), invalidate_token() and the token request.
     """
 
     CACHE_KEY = "paymob:auth_token"
@@ -22,45 +22,41 @@ class PaymobAuth:
     def __init__(
         self,
         config: PaymobConfig,
-        connection_pool: ConnectionPool,
         cache_backend: CacheBackend | None = None,
         token_ttl: int = 55 * 60,  # 55 minutes (5 minutes before actual expiry)
     ):
         self.config = config
-        self.connection_pool = connection_pool
         self.cache_backend = cache_backend or MemoryCache()
         self._refresh_attempts = 0
         self._last_refresh_hour = -1
         self.token_ttl = token_ttl
+        # Process-local copy of the token, so steady-state reads skip the cache backend
+        self._local_token: str | None = None
+        self._local_expires_at: float = 0.0
 
-    def _request_token(self) -> str:
-        """Request new authentication token from Paymob API."""
-        url = f"{self.config.base_url}/api/auth/tokens"
-        data = {"api_key": self.config.api_key}
+    def _token_url(self) -> str:
+        """Paymob endpoint that exchanges the API key for a token."""
+        return f"{self.config.base_url}/api/auth/tokens"
 
-        try:
-            response = self.connection_pool.post(url, json=data)
-            response.raise_for_status()
+    def _token_from_response(self, response) -> str:
+        """Extract the token from a token request response."""
+        response.raise_for_status()
 
-            response_data = response.json()
-            token = response_data.get("token")
+        response_data = response.json()
+        token = response_data.get("token")
 
-            if not token:
-                raise AuthenticationError("No token received from Paymob API")
+        if not token:
+            raise AuthenticationError("No token received from Paymob API")
 
-            logger.info("Successfully obtained new Paymob authentication token")
-            return token
-
-        except Exception as e:
-            logger.error(f"Failed to request authentication token: {e}")
-            raise AuthenticationError(f"Token request failed: {e}")
+        logger.info("Successfully obtained new Paymob authentication token")
+        return token
 
     def _get_cached_token(self) -> str | None:
         """Get token from cache backend."""
         try:
             return self.cache_backend.get(self.CACHE_KEY)
         except Exception as e:
-            logger.warning(f"Failed to get cached token: {e}")
+            logger.warning("Failed to get cached token: %s", e)
             return None
 
     def _cache_token(self, token: str) -> None:
@@ -69,7 +65,22 @@ class PaymobAuth:
             self.cache_backend.set(self.CACHE_KEY, token, self.token_ttl)
             logger.debug("Token cached successfully")
         except Exception as e:
-            logger.warning(f"Failed to cache token: {e}")
+            logger.warning("Failed to cache token: %s", e)
+
+    def _set_local_token(self, token: str) -> None:
+        """Memoize token in-process, capped at 60s to bound staleness vs. the shared cache."""
+        self._local_token = token
+        self._local_expires_at = time.monotonic() + min(self.token_ttl, 60)
+
+    def _clear_local_token(self) -> None:
+        """Drop the in-process token."""
+        self._local_token = None
+        self._local_expires_at = 0.0
+
+    def _store_token(self, token: str) -> None:
+        """Save a freshly requested token to the cache backend and the local memo."""
+        self._cache_token(token)
+        self._set_local_token(token)
 
     def _track_refresh_attempts(self) -> None:
         """Track token refresh attempts to detect issues."""
@@ -83,9 +94,67 @@ class PaymobAuth:
 
         if self._refresh_attempts > 3:  # More than 3 refreshes per hour
             logger.warning(
-                f"High token refresh rate: {self._refresh_attempts} times this hour"
+                "High token refresh rate: %s times this hour", self._refresh_attempts
             )
 
+    def _get_local_token(self) -> str | None:
+        """Get token from the process-local copy, no cache backend round-trip."""
+        token = self._local_token
+        if token and time.monotonic() < self._local_expires_at:
+            return token
+        return None
+
+    def _get_shared_token(self) -> str | None:
+        """Get token from the shared cache backend, and memoize it locally."""
+        cached_token = self._get_cached_token()
+        if cached_token:
+            logger.debug("Using cached authentication token")
+            self._set_local_token(cached_token)
+        return cached_token
+
+    def _invalidate_cached_token(self) -> None:
+        """Drop the token from the local memo and the cache backend."""
+        self._clear_local_token()
+        try:
+            self.cache_backend.delete(self.CACHE_KEY)
+            logger.info("Authentication token invalidated")
+        except Exception as e:
+            logger.warning("Failed to invalidate token: %s", e)
+
+
+class PaymobAuth(_BasePaymobAuth):
+    """
+    Paymob requires a 1-hr expired token for some requests.
+    This class handles token request, caching, and refreshing.
+
+    PaymobAuth.get_token() returns the token.
+    PaymobAuth.invalidate_token() removes the token from cache.
+    """
+
+    def __init__(
+        self,
+        config: PaymobConfig,
+        connection_pool: ConnectionPool,
+        cache_backend: CacheBackend | None = None,
+        token_ttl: int = 55 * 60,  # 55 minutes (5 minutes before actual expiry)
+    ):
+        super().__init__(config, cache_backend, token_ttl)
+        self.connection_pool = connection_pool
+        # Serializes refreshes so concurrent cache misses trigger a single token request
+        self._refresh_lock = threading.Lock()
+
+    def _request_token(self) -> str:
+        """Request new authentication token from Paymob API."""
+        data = {"api_key": self.config.api_key}
+
+        try:
+            response = self.connection_pool.post(self._token_url(), json=data)
+            return self._token_from_response(response)
+
+        except Exception as e:
+            logger.error("Failed to request authentication token: %s", e)
+            raise AuthenticationError(f"Token request failed: {e}")
+
     def get_token(self, force_refresh: bool = False) -> str:
         """
         Get valid authentication token.
@@ -101,27 +170,116 @@ class PaymobAuth:
         """
         # Try cached token first (unless force refresh)
         if not force_refresh:
-            cached_token = self._get_cached_token()
-            if cached_token:
-                logger.debug("Using cached authentication token")
-                return cached_token
+            token = self._get_memoized_token()
+            if token:
+                return token
 
-        # Track refresh attempts
-        self._track_refresh_attempts()
+        with self._refresh_lock:
+            # Another thread may have refreshed the token while we were waiting
+            if not force_refresh:
+                token = self._get_memoized_token()
+                if token:
+                    return token
 
-        # Request new token
-        logger.info("Requesting new authentication token")
-        token = self._request_token()
+            # Track refresh attempts
+            self._track_refresh_attempts()
 
-        # Cache the new token
-        self._cache_token(token)
+            # Request new token
+            logger.info("Requesting new authentication token")
+            token = self._request_token()
 
-        return token
+            # Cache the new token
+            self._store_token(token)
+
+            return token
+
+    def _get_memoized_token(self) -> str | None:
+        """Get token from the process-local copy, falling back to the cache backend."""
+        return self._get_local_token() or self._get_shared_token()
 
     def invalidate_token(self) -> None:
         """Invalidate cached token."""
+        self._invalidate_cached_token()
+
+
+class PaymobAsyncAuth(_BasePaymobAuth):
+    """
+    Async counterpart of PaymobAuth, for use with AsyncConnectionPool.
+
+    await PaymobAsyncAuth.get_token() returns the token.
+    await PaymobAsyncAuth.invalidate_token() removes the token from cache.
+    Cache backend calls (e.g. RedisCache's sync redis.Redis) run in a worker
+    thread, so they don't block the event loop.
+    """
+
+    def __init__(
+        self,
+        config: PaymobConfig,
+        connection_pool: AsyncConnectionPool,
+        cache_backend: CacheBackend | None = None,
+        token_ttl: int = 55 * 60,  # 55 minutes (5 minutes before actual expiry)
+    ):
+        super().__init__(config, cache_backend, token_ttl)
+        self.connection_pool = connection_pool
+        # Serializes refreshes so concurrent cache misses trigger a single token request
+        self._refresh_lock = asyncio.Lock()
+
+    async def _request_token(self) -> str:
+        """Request new authentication token from Paymob API."""
+        data = {"api_key": self.config.api_key}
+
         try:
-            self.cache_backend.delete(self.CACHE_KEY)
-            logger.info("Authentication token invalidated")
+            response = await self.connection_pool.post(self._token_url(), json=data)
+            return self._token_from_response(response)
+
         except Exception as e:
-            logger.warning(f"Failed to invalidate token: {e}")
+            logger.error("Failed to request authentication token: %s", e)
+            raise AuthenticationError(f"Token request failed: {e}")
+
+    async def get_token(self, force_refresh: bool = False) -> str:
+        """
+        Get valid authentication token.
+
+        Args:
+            force_refresh: If True, bypass cache and request new token
+
+        Returns:
+            Valid authentication token
+
+        Raises:
+            AuthenticationError: If token request fails
+        """
+        # Try cached token first (unless force refresh)
+        if not force_refresh:
+            token = await self._get_memoized_token()
+            if token:
+                return token
+
+        async with self._refresh_lock:
+            # Another task may have refreshed the token while we were waiting
+            if not force_refresh:
+                token = await self._get_memoized_token()
+                if token:
+                    return token
+
+            # Track refresh attempts
+            self._track_refresh_attempts()
+
+            # Request new token
+            logger.info("Requesting new authentication token")
+            token = await self._request_token()
+
+            # Cache the new token
+            await asyncio.to_thread(self._store_token, token)
+
+            return token
+
+    async def _get_memoized_token(self) -> str | None:
+        """Get token from the process-local copy, falling back to the cache backend."""
+        return self._get_local_token() or await asyncio.to_thread(
+            self._get_shared_token
+        )
+
+    async def invalidate_token(self) -> None:
+        """Invalidate cached token."""
+        await asyncio.to_thread(self._invalidate_cached_token)
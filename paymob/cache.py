@@ -1,7 +1,11 @@
 # Simple memory cache for now - Redis will be implemented later
+import heapq
+import json
+import threading
 import time
-from typing import Protocol
+from typing import Any, Protocol
 import logging
+from requests.structures import CaseInsensitiveDict
 
 logger = logging.getLogger(__name__)
 
@@ -23,39 +27,81 @@ class CacheBackend(Protocol):
 
 
 class MemoryCache:
-    """Simple in-memory cache implementation."""
+    """
+    Simple in-memory cache implementation.
+    Expired keys are purged lazily on get, and swept in batches every
+    SWEEP_INTERVAL sets using a min-heap of expiry times.
+    Safe to share across threads (e.g. through PaymobAuth).
+    """
+    
+    SWEEP_INTERVAL = 100
     
     def __init__(self):
         self._cache: dict[str, tuple[str, float]] = {}
+        self._expiry: list[tuple[float, str]] = []  # min-heap of (expires_at, key)
+        self._sets_since_sweep = 0
+        # Guards writes, so an eviction never removes a value a concurrent set() just stored
+        self._lock = threading.Lock()
     
     def get(self, key: str) -> str|None:
         """Get value from cache, return None if expired or missing."""
-        if key not in self._cache:
+        entry = self._cache.get(key)
+        if entry is None:
             return None
         
-        value, expires_at = self._cache[key]
-        if time.time() > expires_at:
-            del self._cache[key]
+        value, expires_at = entry
+        if time.monotonic() > expires_at:
+            with self._lock:
+                # Only evict the expired entry, not one set meanwhile
+                if self._cache.get(key) is entry:
+                    self._cache.pop(key, None)
             return None
         
         return value
     
     def set(self, key: str, value: str, ttl: int) -> None:
         """Set value in cache with TTL in seconds."""
-        expires_at = time.time() + ttl
-        self._cache[key] = (value, expires_at)
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._cache[key] = (value, expires_at)
+            heapq.heappush(self._expiry, (expires_at, key))
+            
+            self._sets_since_sweep += 1
+            if self._sets_since_sweep >= self.SWEEP_INTERVAL:
+                self._sweep()
     
     def delete(self, key: str) -> None:
         """Delete key from cache."""
-        self._cache.pop(key, None)
+        with self._lock:
+            self._cache.pop(key, None)
     
     def clear(self) -> None:
         """Clear all cached values."""
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._expiry.clear()
+            self._sets_since_sweep = 0
+    
+    def _sweep(self) -> None:
+        """
+        Evict expired keys, skipping heap entries for keys that were overwritten or deleted.
+        Must be called with self._lock held.
+        """
+        now = time.monotonic()
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(expiry)
+            entry = self._cache.get(key)
+            if entry is not None and entry[1] == expires_at:
+                self._cache.pop(key, None)
+        self._sets_since_sweep = 0
 
 
 class RedisCache:
-    """Redis cache backend implementation."""
+    """
+    Redis cache backend implementation.
+    Uses SETEX (single round-trip) rather than SET + EXPIRE.
+    """
     
     def __init__(self, redis_client):
         """
@@ -65,26 +111,63 @@ class RedisCache:
             redis_client: Redis client instance (e.g., redis.Redis())
         """
         self.redis_client = redis_client
+        # Bind client methods once to skip attribute lookups per call
+        self._get = redis_client.get
+        self._setex = redis_client.setex
+        self._delete = redis_client.delete
     
     def get(self, key: str) -> str|None:
         """Get value from Redis cache."""
         try:
-            value = self.redis_client.get(key)
+            value = self._get(key)
             return value.decode('utf-8') if value else None
         except Exception as e:
-            logger.warning(f"Redis get failed for key '{key}': {e}")
+            logger.warning("Redis get failed for key '%s': %s", key, e)
             return None
     
     def set(self, key: str, value: str, ttl: int) -> None:
         """Set value in Redis cache with TTL."""
         try:
-            self.redis_client.setex(key, ttl, value)
+            self._setex(key, ttl, value)
         except Exception as e:
-            logger.warning(f"Redis set failed for key '{key}': {e}")
+            logger.warning("Redis set failed for key '%s': %s", key, e)
     
     def delete(self, key: str) -> None:
         """Delete key from Redis cache."""
         try:
-            self.redis_client.delete(key)
+            self._delete(key)
         except Exception as e:
-            logger.warning(f"Redis delete failed for key '{key}': {e}")
+            logger.warning("Redis delete failed for key '%s': %s", key, e)
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for a successful requests.Response served from cache.
+    Exposes status_code, ok, reason, headers, encoding, text, content,
+    json() and raise_for_status().
+    """
+    
+    status_code = 200
+    ok = True
+    reason = "OK"
+    encoding = "utf-8"
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        self._json: Any = None
+    
+    @property
+    def content(self) -> bytes:
+        """The cached body as bytes."""
+        return self.text.encode("utf-8")
+    
+    def json(self) -> Any:
+        """Parse the cached body, once."""
+        if self._json is None:
+            self._json = json.loads(self.text)
+        return self._json
+    
+    def raise_for_status(self) -> None:
+        """Cached responses are always successful."""
+        return None
@@ -1,22 +1,154 @@
 from typing import Any
-from paymob.connection import ConnectionPool
-from paymob.exceptions import ValidationError
+from paymob.connection import AsyncConnectionPool, ConnectionPool
+from paymob.exceptions import ConfigurationError, ValidationError
 from paymob.utility import validate_email
 from paymob.config import PaymobConfig
-from paymob.auth_utility import PaymobAuth
+from paymob.auth_utility import PaymobAsyncAuth, PaymobAuth
+from paymob.cache import CachedResponse, MemoryCache
+import asyncio
+import hashlib
 import logging
-from datetime import datetime
+import random
+import re
+from datetime import date
 import requests
 
 logger = logging.getLogger(__name__)
 
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+_OPTIONAL_PARAMS = (
+    "subscription_plan_id",
+    "subscription_start_date",
+    "special_reference",
+    "notification_url",
+    "redirection_url",
+    "extras",
+    "billing_data",
+    "expiration",
+    "items",
+)
+
+# optional params for billing_data
+_BILLING_DATA_KEYS = frozenset(
+    {
+        "apartment",
+        "street",
+        "building",
+        "country",
+        "floor",
+        "state",
+        "city",
+        "postal_code",
+        "extra_description",
+        "shipping_method",
+    }
+)
+
+
+def _add_billing_data(payload: dict[str, Any], billing_data: Any) -> None:
+    if not isinstance(billing_data, dict):
+        raise ValidationError(
+            f"billing_data must be a dictionary, not {type(billing_data)}"
+        )
+    payload["billing_data"].update(
+        {k: v for k, v in billing_data.items() if (k in _BILLING_DATA_KEYS) and v}
+    )
+
+
+def _add_subscription_start_date(payload: dict[str, Any], start_date: Any) -> None:
+    # The regex pins the format, fromisoformat validates the calendar date (e.g. Feb 30)
+    try:
+        if not _ISO_DATE.match(start_date):
+            raise ValueError
+        date.fromisoformat(start_date)
+    except ValueError:
+        raise ValidationError("Invalid date format. Please use YYYY-MM-DD format.") from None
+    payload["subscription_start_date"] = start_date
+
+
+def _add_extras(payload: dict[str, Any], extras: Any) -> None:
+    if not isinstance(extras, dict):
+        raise ValidationError(f"extras must be a dictionary, not {type(extras)}")
+    payload["extras"] = extras
+
+
+def _add_items(payload: dict[str, Any], items: Any) -> None:
+    if not isinstance(items, list):
+        raise ValidationError(f"items must be a list, not {type(items)}")
+    # name and amount are required for each item
+    for item in items:
+        if not item.get("name"):
+            raise ValidationError("Item name is required")
+        if not item.get("amount"):
+            raise ValidationError("Item amount is required")
+        if item.get("amount") <= 0:
+            raise ValidationError("Item amount must be greater than 0")
+    payload["items"] = items
+
+
+# Optional params that need validation or special placement in the payload,
+# the rest are copied as is
+_OPTIONAL_PARAM_HANDLERS = {
+    "billing_data": _add_billing_data,
+    "subscription_start_date": _add_subscription_start_date,
+    "extras": _add_extras,
+    "items": _add_items,
+}
+
 
 class PaymobTransaction:
 
-    def __init__(self, connection_pool: ConnectionPool, config: PaymobConfig) -> None:
+    # Scoped by account (api_key hash), merchant_order_ids are only unique per merchant
+    TRANSACTION_REF_CACHE_KEY = "paymob:tx_ref:{account}:{ref}"
+    TRANSACTION_REF_CACHE_TTL = 120  # 2 minutes, jittered by +-10 seconds
+
+    def __init__(
+        self,
+        connection_pool: ConnectionPool | None,
+        config: PaymobConfig,
+        async_connection_pool: AsyncConnectionPool | None = None,
+    ) -> None:
+        """
+        Args:
+            connection_pool: Required only for the sync methods,
+                can be None for async only use
+            config: Paymob core configuration
+            async_connection_pool: Required only for the *_async methods
+        Raises:
+            ConfigurationError: If neither connection pool is given
+        """
+        if connection_pool is None and async_connection_pool is None:
+            raise ConfigurationError(
+                "connection_pool or async_connection_pool is required"
+            )
         self.config = config
+        # Shared by sync and async calls, so both reuse the same token
+        self.cache_backend = MemoryCache()
         self.pool = connection_pool
-        self.auth = PaymobAuth(config, connection_pool)
+        self.auth = (
+            PaymobAuth(config, connection_pool, self.cache_backend)
+            if connection_pool is not None
+            else None
+        )
+        self.async_pool = async_connection_pool
+        self.async_auth = (
+            PaymobAsyncAuth(config, async_connection_pool, self.cache_backend)
+            if async_connection_pool is not None
+            else None
+        )
+        # Endpoints that auth with the secret key, which is fixed for the config's life
+        self._secret_headers = {
+            "Authorization": f"Token {config.secret_key}",
+            "Content-Type": "application/json",
+        }
+        self._cache_account = hashlib.sha256(
+            str(config.api_key).encode("utf-8")
+        ).hexdigest()
+        self._checkout_prefix = (
+            "https://accept.paymob.com/unifiedcheckout/"
+            f"?publicKey={config.public_key}&clientSecret="
+        )
 
     def create_payment_intent(
         self,
@@ -69,10 +201,67 @@ class PaymobTransaction:
             subscription_start_date (str: YYYY-MM-DD): Start subscription in future date *Optional for subscription*
 
         Returns:
-            dict containing checkout_url and response
+            dict containing checkout_url, response and data (the already parsed response body)
+        """
+
+        payload = self._build_payment_payload(locals())
+
+        # Make request
+        # This endpoint auth with the secret key
+        pool, _ = self._require_sync()
+        response = pool.post(
+            self._url("/v1/intention/"), headers=self._secret_headers, json=payload
+        )
+
+        return self._payment_intent_result(response)
+
+    async def create_payment_intent_async(
+        self,
+        *,
+        amount_cents: int,
+        currency: str,
+        payment_method_ids: list[int | str],
+        first_name: str,
+        last_name: str,
+        email: str,
+        phone_number: str,
+        items: list[dict[str, str | int]] | None = None,
+        special_reference: str | None = None,
+        extras: dict[str, Any] | None = None,
+        notification_url: str | None = None,
+        redirection_url: str | None = None,
+        billing_data: dict[str, str] | None = None,
+        subscription_plan_id: str | None = None,
+        subscription_start_date: str | None = None,
+        expiration: int | None = None,
+    ) -> dict[str, Any]:
+        """
+        Async variant of create_payment_intent, requires async_connection_pool.
+        Check create_payment_intent for the arguments.
         """
+        async_pool, _ = self._require_async()
+        payload = self._build_payment_payload(locals())
 
-        self.validate_payment_input(amount_cents, payment_method_ids, email)
+        # Make request
+        # This endpoint auth with the secret key
+        response = await async_pool.post(
+            self._url("/v1/intention/"), headers=self._secret_headers, json=payload
+        )
+
+        return self._payment_intent_result(response)
+
+    @classmethod
+    def _build_payment_payload(cls, params: dict[str, Any]) -> dict[str, Any]:
+        """
+        Validate create_payment_intent arguments and build the request payload
+        Raises:
+            ValidationError
+        """
+        amount_cents = params["amount_cents"]
+        payment_method_ids = params["payment_method_ids"]
+        email = params["email"]
+
+        cls.validate_payment_input(amount_cents, payment_method_ids, email)
         try:
             payment_method_ids = list(map(int, payment_method_ids))
         except:
@@ -82,33 +271,29 @@ class PaymobTransaction:
         payload = {
             "amount": amount_cents,
             "payment_methods": payment_method_ids,
-            "currency": currency,
+            "currency": params["currency"],
             "billing_data": {
-                "first_name": first_name,
+                "first_name": params["first_name"],
                 "email": email,
-                "phone_number": phone_number,
-                "last_name": last_name,
+                "phone_number": params["phone_number"],
+                "last_name": params["last_name"],
             },
         }
 
         # Add optional params
-        self._add_optional_payment_params(payload, locals())
-
-        # Make request
-        # This endpoint auth with the secret key
-        headers = {
-            "Authorization": f"Token {self.config.secret_key}",
-            "Content-Type": "application/json",
-        }
-
-        response = self.pool.post("/v1/intention/", headers=headers, json=payload)
+        cls._add_optional_payment_params(payload, params)
+        return payload
 
+    def _payment_intent_result(self, response: requests.Response) -> dict[str, Any]:
+        """Build create_payment_intent result from the intention response"""
         response.raise_for_status()
-        checkout_url = "https://accept.paymob.com/unifiedcheckout/?publicKey={self.config.public_key}&clientSecret={response['client_secret']}"
-        logger.debug(f"Checkout URL: {checkout_url}")
+        body = response.json()
+        checkout_url = self._checkout_prefix + body["client_secret"]
+        logger.debug("Checkout URL: %s", checkout_url)
         return {
             "checkout_url": checkout_url,
             "response": response,
+            "data": body,
         }
 
     @staticmethod
@@ -137,132 +322,159 @@ class PaymobTransaction:
         Raises:
             ValidationError
         """
-        optional_params = [
-            "subscription_plan_id",
-            "subscription_start_date",
-            "special_reference",
-            "notification_url",
-            "redirection_url",
-            "extras",
-            "billing_data",
-            "expiration",
-            "items",
-        ]
-        # optional params for billing_data
-        billing_data_keys = [
-            "apartment",
-            "street",
-            "building",
-            "country",
-            "floor",
-            "state",
-            "city",
-            "postal_code",
-            "extra_description",
-            "shipping_method",
-        ]
-
-        for param in optional_params:
-            if params.get(param):
-                if param == "billing_data":
-                    if type(params[param]) != dict:
-                        raise ValidationError(
-                            f"billing_data must be a dictionary, not {type(params[param])}"
-                        )
-                    payload["billing_data"].update(
-                        {
-                            k: v
-                            for k, v in params["billing_data"].items()
-                            if (k in billing_data_keys) and v
-                        }
-                    )
-                    continue
-                if param == "subscription_start_date":
-                    try:
-                        datetime.strptime(params[param], "%Y-%m-%d")
-                    except ValueError:
-                        raise ValidationError(
-                            f"Invalid date format. Please use YYYY-MM-DD format."
-                        )
-                if param == "extras":
-                    if type(params[param]) != dict:
-                        raise ValidationError(
-                            f"extras must be a dictionary, not {type(params[param])}"
-                        )
-
-                if param == "items":
-                    if type(params[param]) != list:
-                        raise ValidationError(
-                            f"items must be a list, not {type(params[param])}"
-                        )
-                    # name and amount are required for each item
-                    for item in params[param]:
-                        if not item.get("name"):
-                            raise ValidationError("Item name is required")
-                        if not item.get("amount"):
-                            raise ValidationError("Item amount is required")
-                        if item.get("amount") <= 0:
-                            raise ValidationError("Item amount must be greater than 0")
-
-                payload[param] = params[param]
-
-    def get_transaction_by_id(
-        self, transaction_id: int, excuted: bool = False
+        for param in _OPTIONAL_PARAMS:
+            value = params.get(param)
+            if not value:
+                continue
+            handler = _OPTIONAL_PARAM_HANDLERS.get(param)
+            if handler:
+                handler(payload, value)
+            else:
+                payload[param] = value
+
+    def _url(self, path: str) -> str:
+        """Absolute URL of an API path, config.base_url is the only base URL"""
+        return self.config.base_url + path
+
+    def _authed_request(
+        self, method: str, path: str, *, json: dict[str, Any] | None = None
     ) -> requests.Response:
+        """
+        Make a request authenticated with the Bearer token
+        In case of 403 error, the token will be force refreshed and the request will be retried once
+        Raises:
+            requests.exceptions.HTTPError
+        """
+        pool, auth = self._require_sync()
+        for force_refresh in (False, True):
+            token = auth.get_token(force_refresh=force_refresh)
+            headers = {"Authorization": "Bearer " + token}
+            response = pool.request(
+                method, self._url(path), headers=headers, json=json
+            )
+            if response.status_code != 403:
+                break
+
+        response.raise_for_status()
+        return response
+
+    def get_transaction_by_id(self, transaction_id: int) -> requests.Response:
         """
         Retrieve a transaction information by its ID
         In case of 403 error, the token will be froce refreshed and the request will be retried once
         """
-
-        token = (
-            self.auth.get_token()
-            if not excuted
-            else self.auth.get_token(force_refresh=True)
-        )
-        headers = {"Authorization": f"Bearer {token}"}
-        response = self.pool.get(
-            f"/api/acceptance/transactions/{transaction_id}", headers=headers
+        return self._authed_request(
+            "GET", f"/api/acceptance/transactions/{transaction_id}"
         )
-        try:
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 403 and not excuted:
-                return self.get_transaction_by_id(
-                    transaction_id=transaction_id, excuted=True
-                )
-            raise e
-
-        return response
 
-    # TODO: Cache this for 2 minutes
     def get_transaction_by_ref(
-        self, transaction_ref: str, excuted: bool = False
-    ) -> requests.Response:
-        """Retrieve a transaction information by its Special Reference (Merchant Order ID)"""
+        self, transaction_ref: str
+    ) -> requests.Response | CachedResponse:
+        """
+        Retrieve a transaction information by its Special Reference (Merchant Order ID)
+        Settled (no longer pending) transactions are cached for ~2 minutes in the
+        cache backend, in which case a CachedResponse is returned
+        """
+        cache_key = self._transaction_ref_cache_key(transaction_ref)
+        cached = self._get_cached_transaction(cache_key)
+        if cached:
+            return cached
 
-        token = (
-            self.auth.get_token()
-            if not excuted
-            else self.auth.get_token(force_refresh=True)
+        response = self._authed_request(
+            "POST",
+            "/api/ecommerce/orders/transaction_inquiry",
+            json={"merchant_order_id": transaction_ref},
         )
-        headers = {"Authorization": f"Bearer {token}"}
-        data = {"merchant_order_id": transaction_ref}
+        self._cache_transaction(cache_key, response)
+        return response
 
-        response = self.pool.post(
-            f"/api/ecommerce/orders/transaction_inquiry",
-            headers=headers,
-            json=data,
+    def _transaction_ref_cache_key(self, transaction_ref: str) -> str:
+        """Cache key of a transaction ref, scoped to this config's account."""
+        return self.TRANSACTION_REF_CACHE_KEY.format(
+            account=self._cache_account, ref=transaction_ref
         )
 
+    def _get_cached_transaction(self, cache_key: str) -> CachedResponse | None:
+        """Get a transaction response from the cache backend."""
         try:
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 403 and not excuted:
-                return self.get_transaction_by_ref(
-                    transaction_ref=transaction_ref, excuted=True
-                )
-            raise e
+            cached = self.cache_backend.get(cache_key)
+        except Exception as e:
+            logger.warning("Failed to get cached transaction: %s", e)
+            return None
+        return CachedResponse(cached) if cached else None
 
+    def _cache_transaction(self, cache_key: str, response: Any) -> None:
+        """Cache a settled transaction response body with a jittered TTL."""
+        # Pending transactions still change, callers polling them need the fresh state
+        try:
+            body = response.json()
+        except ValueError:
+            return
+        if not isinstance(body, dict) or body.get("pending") is not False:
+            return
+
+        # Jitter the TTL so refs cached in a burst don't expire together
+        ttl = self.TRANSACTION_REF_CACHE_TTL + random.randint(-10, 10)
+        try:
+            self.cache_backend.set(cache_key, response.text, ttl)
+        except Exception as e:
+            logger.warning("Failed to cache transaction: %s", e)
+
+    def _require_sync(self) -> tuple[ConnectionPool, PaymobAuth]:
+        """
+        Raises:
+            ConfigurationError: If no connection_pool was given
+        """
+        if self.pool is None or self.auth is None:
+            raise ConfigurationError("connection_pool is required for sync methods")
+        return self.pool, self.auth
+
+    def _require_async(self) -> tuple[AsyncConnectionPool, PaymobAsyncAuth]:
+        """
+        Raises:
+            ConfigurationError: If no async_connection_pool was given
+        """
+        if self.async_pool is None or self.async_auth is None:
+            raise ConfigurationError(
+                "async_connection_pool is required for async methods"
+            )
+        return self.async_pool, self.async_auth
+
+    async def _authed_request_async(
+        self, method: str, path: str, *, json: dict[str, Any] | None = None
+    ) -> Any:
+        """Async variant of _authed_request"""
+        async_pool, async_auth = self._require_async()
+        for force_refresh in (False, True):
+            token = await async_auth.get_token(force_refresh=force_refresh)
+            headers = {"Authorization": "Bearer " + token}
+            response = await async_pool.request(
+                method, self._url(path), headers=headers, json=json
+            )
+            if response.status_code != 403:
+                break
+
+        response.raise_for_status()
         return response
 
+    async def get_transaction_by_id_async(self, transaction_id: int) -> Any:
+        """Async variant of get_transaction_by_id, requires async_connection_pool"""
+        return await self._authed_request_async(
+            "GET", f"/api/acceptance/transactions/{transaction_id}"
+        )
+
+    async def get_transaction_by_ref_async(self, transaction_ref: str) -> Any:
+        """Async variant of get_transaction_by_ref, requires async_connection_pool"""
+        cache_key = self._transaction_ref_cache_key(transaction_ref)
+        # Cache backend calls (e.g. a sync Redis client) block, keep them off the event loop
+        cached = await asyncio.to_thread(self._get_cached_transaction, cache_key)
+        if cached:
+            return cached
 
+        response = await self._authed_request_async(
+            "POST",
+            "/api/ecommerce/orders/transaction_inquiry",
+            json={"merchant_order_id": transaction_ref},
+        )
+        await asyncio.to_thread(self._cache_transaction, cache_key, response)
+        return response
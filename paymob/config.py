@@ -1,3 +1,4 @@
+import os
 from paymob.exceptions import ConfigurationError
 from typing import Any
 
@@ -8,6 +9,15 @@ class PaymobConfig:
     
     """
 
+    __slots__ = (
+        "api_key",
+        "public_key",
+        "secret_key",
+        "integration_id",
+        "base_url",
+        "hmac_secret_key",
+    )
+
     def __init__(
         self,
         api_key: str | None = None,
@@ -38,15 +48,14 @@ class PaymobConfig:
             - PAYMOB_BASE_URL
             - PAYMOB_HMAC_SECRET_KEY
         """
-        import os
-
+        env = os.environ
         return cls(
-            api_key=os.getenv("PAYMOB_API_KEY"),
-            public_key=os.getenv("PAYMOB_PUBLIC_KEY"),
-            secret_key=os.getenv("PAYMOB_SECRET_KEY"),
-            integration_id=os.getenv("PAYMOB_INTEGRATION_ID"),
-            base_url=os.getenv("PAYMOB_BASE_URL", "https://accept.paymob.com"),
-            hmac_secret_key=os.getenv("PAYMOB_HMAC_SECRET_KEY"),
+            api_key=env.get("PAYMOB_API_KEY"),
+            public_key=env.get("PAYMOB_PUBLIC_KEY"),
+            secret_key=env.get("PAYMOB_SECRET_KEY"),
+            integration_id=env.get("PAYMOB_INTEGRATION_ID"),
+            base_url=env.get("PAYMOB_BASE_URL", "https://accept.paymob.com"),
+            hmac_secret_key=env.get("PAYMOB_HMAC_SECRET_KEY"),
         )
 
     @classmethod
@@ -104,7 +113,7 @@ class PaymobConnectionConfig:
     def default(cls) -> 'PaymobConnectionConfig':
         """Return default configuration."""
         return cls(
-            pool_size=1,  # Single connection for most use cases
+            pool_size=4,  # Connection pools (per host) to cache
             timeout=15,   # 15 second timeout
             keep_alive=True,  # Enable keep-alive for better performance
             max_retries=3,    # Retry failed requests
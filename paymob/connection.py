@@ -1,4 +1,5 @@
-from typing import Any
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -6,9 +7,38 @@ from requests.exceptions import RequestException, HTTPError, Timeout, Connection
 
 import logging
 
+if TYPE_CHECKING:
+    import httpx
+else:
+    try:
+        import httpx  # optional, only needed for HttpxConnectionPool/AsyncConnectionPool
+    except ImportError:
+        httpx = None
+
 logger = logging.getLogger(__name__)
 
-class ConnectionPool:
+# Minimum number of connections kept alive per host
+_POOL_MAXSIZE = 20
+# Responses worth retrying
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Only the verbs Paymob's API uses
+_RETRY_METHODS = frozenset({"GET", "POST", "PUT", "DELETE"})
+
+
+class _BaseConnectionPool(ABC):
+    """
+    Settings, URL validation and verb helpers shared by the connection pools.
+    Subclasses implement request(), the helpers return whatever it returns
+    (a coroutine for AsyncConnectionPool).
+    """
+    
+    __slots__ = (
+        "pool_size",
+        "timeout",
+        "keep_alive",
+        "max_retries",
+        "backoff_factor",
+    )
     
     def __init__(
         self,
@@ -16,18 +46,66 @@ class ConnectionPool:
         timeout: int = 15,
         keep_alive: bool = True,
         max_retries: int = 3,
-        backoff_factor: float = 0.3
+        backoff_factor: float = 0.3,
     ):
         self.pool_size = pool_size
         self.timeout = timeout
         self.keep_alive = keep_alive
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
-        
+    
+    @staticmethod
+    def _check_url(url: str) -> None:
+        """
+        Only absolute https URLs are allowed, callers build them from PaymobConfig.base_url
+        Raises:
+            ValueError
+        """
+        if not url.startswith('https://'):
+            raise ValueError("Only HTTPS URLs are allowed for security reasons")
+    
+    @abstractmethod
+    def request(self, method: str, url: str, **kwargs) -> Any:
+        """Make an HTTP request, url must be https."""
+    
+    def get(self, url: str, **kwargs) -> Any:
+        """Convenience method for GET requests."""
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> Any:
+        """Convenience method for POST requests."""
+        return self.request('POST', url, **kwargs)
+    
+    def put(self, url: str, **kwargs) -> Any:
+        """Convenience method for PUT requests."""
+        return self.request('PUT', url, **kwargs)
+    
+    def delete(self, url: str, **kwargs) -> Any:
+        """Convenience method for DELETE requests."""
+        return self.request('DELETE', url, **kwargs)
+
+
+class ConnectionPool(_BaseConnectionPool):
+    
+    __slots__ = ("session",)
+    
+    def __init__(
+        self,
+        pool_size: int = 1,
+        timeout: int = 15,
+        keep_alive: bool = True,
+        max_retries: int = 3,
+        backoff_factor: float = 0.3,
+    ):
+        super().__init__(
+            pool_size, timeout, keep_alive, max_retries, backoff_factor
+        )
+        # Created eagerly so the first request doesn't pay for the adapter setup
+        self.session: requests.Session | None = self._create_session()
         
     def _get_session(self) -> requests.Session:
         """Get or create a session"""
-        if not hasattr(self, 'session') or self.session is None:
+        if self.session is None:
             self.session = self._create_session()
         return self.session
     
@@ -39,15 +117,20 @@ class ConnectionPool:
         retry_strategy = Retry(
             total=self.max_retries,
             backoff_factor=self.backoff_factor,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "POST", "PUT", "DELETE", "OPTIONS", "TRACE"]
+            status_forcelist=_RETRY_STATUSES,
+            allowed_methods=_RETRY_METHODS,
+            respect_retry_after_header=True  # honor Paymob's Retry-After on 429/503
         )
         
         # Configure HTTP adapter with connection pooling
+        # pool_maxsize is decoupled from pool_size so threaded callers get concurrent
+        # keep-alive sockets instead of throwaway connections
+        # pool_block=False opens extra (non-pooled) connections on bursts instead of blocking
         adapter = HTTPAdapter(
             pool_connections=self.pool_size,
-            pool_maxsize=self.pool_size,
-            max_retries=retry_strategy
+            pool_maxsize=max(self.pool_size, _POOL_MAXSIZE),
+            max_retries=retry_strategy,
+            pool_block=False
         )
         
         session.mount("https://", adapter)
@@ -76,7 +159,7 @@ class ConnectionPool:
         
         Args:
             method: HTTP method (GET, POST, etc.)
-            url: Target URL
+            url: Target URL, must be https
             headers: Optional headers dict
             json: JSON payload for POST/PUT requests
             data: Form data payload
@@ -89,9 +172,7 @@ class ConnectionPool:
         Raises:
             requests.RequestException: For connection or HTTP errors
         """
-        # only https
-        if not url.startswith('https://'):
-            raise ValueError("Only HTTPS URLs are allowed for security reasons")
+        self._check_url(url)
         
         session = self._get_session()
         
@@ -114,30 +195,144 @@ class ConnectionPool:
         except requests.exceptions.RequestException as e:
             # TODO: Handle HTTPErrors more gracefully, especially 40x
             #       403 error should be handled differently
-            logger.error(f"Request failed: {method} {url} - {str(e)}")
+            logger.error("Request failed: %s %s - %s", method, url, e)
             raise
     
-    def get(self, url: str, **kwargs) -> requests.Response:
-        """Convenience method for GET requests."""
-        return self.request('GET', url, **kwargs)
+    def close(self):
+        """Close all sessions"""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
     
-    def post(self, url: str, **kwargs) -> requests.Response:
-        """Convenience method for POST requests."""
-        return self.request('POST', url, **kwargs)
+    def __enter__(self):
+        """Context manager entry."""
+        return self
     
-    def put(self, url: str, **kwargs) -> requests.Response:
-        """Convenience method for PUT requests."""
-        return self.request('PUT', url, **kwargs)
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit - close connections."""
+        self.close()
+
+
+# Kept for callers that want to be explicit about the HTTP backend
+RequestsConnectionPool = ConnectionPool
+
+
+class _BaseHttpxConnectionPool(_BaseConnectionPool):
+    """
+    Setup shared by the httpx based pools.
+    Subclasses implement _create_client() for their httpx client class.
+    """
     
-    def delete(self, url: str, **kwargs) -> requests.Response:
-        """Convenience method for DELETE requests."""
-        return self.request('DELETE', url, **kwargs)
+    __slots__ = ("client",)
+    
+    def __init__(
+        self,
+        pool_size: int = 1,
+        timeout: int = 15,
+        keep_alive: bool = True,
+        max_retries: int = 3,
+        backoff_factor: float = 0.3,
+    ):
+        if httpx is None:
+            raise ImportError(
+                f'{type(self).__name__} requires httpx: pip install "pypaymob[http2]"'
+            )
+        super().__init__(
+            pool_size, timeout, keep_alive, max_retries, backoff_factor
+        )
+        self.client = self._create_client()
+    
+    @abstractmethod
+    def _create_client(self) -> Any:
+        """Create a new HTTP/2 httpx client with connection pooling and retries."""
+    
+    def _httpx_limits(self) -> "httpx.Limits":
+        """Connection limits of the httpx client."""
+        return httpx.Limits(
+            max_keepalive_connections=self.pool_size if self.keep_alive else 0,
+            max_connections=self.pool_size * 4,
+        )
+
+
+class HttpxConnectionPool(_BaseHttpxConnectionPool):
+    """
+    ConnectionPool alternative backed by httpx with HTTP/2 enabled.
+    Concurrent requests to the same host are multiplexed over a single
+    TLS connection instead of one socket per in-flight request.
+
+    Requires httpx with HTTP/2 support: pip install "pypaymob[http2]"
+    ! httpx only retries failed connections, not retryable status codes,
+      backoff_factor is unused
+    """
+    
+    client: "httpx.Client | None"
+    
+    def _get_client(self) -> "httpx.Client":
+        """Get or create a client"""
+        if self.client is None:
+            self.client = self._create_client()
+        return self.client
+    
+    def _create_client(self) -> "httpx.Client":
+        """Create a new HTTP/2 httpx client with connection pooling and retries."""
+        # http2 and limits must be set on the transport, the client ignores them
+        # when a custom transport is given
+        transport = httpx.HTTPTransport(
+            http2=True, limits=self._httpx_limits(), retries=self.max_retries
+        )
+        return httpx.Client(timeout=self.timeout, transport=transport)
+    
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        json: dict[str, Any] | None = None,
+        data: dict[str, Any] | None = None,
+        params: dict[str, Any] | None = None,
+        **kwargs
+    ) -> "httpx.Response":
+        """
+        Make an HTTP request using the connection pool.
+        
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            url: Target URL, must be https
+            headers: Optional headers dict
+            json: JSON payload for POST/PUT requests
+            data: Form data payload
+            params: URL parameters
+            **kwargs: Additional arguments passed to httpx
+            
+        Returns:
+            httpx.Response object
+            
+        Raises:
+            httpx.HTTPError: For connection or HTTP errors
+        """
+        self._check_url(url)
+        client = self._get_client()
+        
+        try:
+            return client.request(
+                method=method.upper(),
+                url=url,
+                headers=headers,
+                json=json,
+                data=data,
+                params=params,
+                **kwargs
+            )
+            
+        except httpx.HTTPError as e:
+            logger.error("Request failed: %s %s - %s", method, url, e)
+            raise
     
     def close(self):
-        """Close all sessions"""
-        if hasattr(self, 'session') and self.session:
-            self.session.close()
-            self.session = None
+        """Close the client and its connections"""
+        if self.client is not None:
+            self.client.close()
+            self.client = None
     
     def __enter__(self):
         """Context manager entry."""
@@ -148,3 +343,90 @@ class ConnectionPool:
         self.close()
 
 
+class AsyncConnectionPool(_BaseHttpxConnectionPool):
+    """
+    Async connection pool backed by httpx.AsyncClient with HTTP/2 enabled.
+    Lets callers run many Paymob requests concurrently on one event loop,
+    e.g. with asyncio.gather(). get/post/put/delete return awaitables.
+
+    Requires httpx with HTTP/2 support: pip install "pypaymob[http2]"
+    ! httpx only retries failed connections, not retryable status codes,
+      backoff_factor is unused
+    """
+    
+    client: "httpx.AsyncClient | None"
+    
+    def _get_client(self) -> "httpx.AsyncClient":
+        """Get or create a client"""
+        if self.client is None:
+            self.client = self._create_client()
+        return self.client
+    
+    def _create_client(self) -> "httpx.AsyncClient":
+        """Create a new HTTP/2 httpx client with connection pooling and retries."""
+        # http2 and limits must be set on the transport, the client ignores them
+        # when a custom transport is given
+        transport = httpx.AsyncHTTPTransport(
+            http2=True, limits=self._httpx_limits(), retries=self.max_retries
+        )
+        return httpx.AsyncClient(timeout=self.timeout, transport=transport)
+    
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        json: dict[str, Any] | None = None,
+        data: dict[str, Any] | None = None,
+        params: dict[str, Any] | None = None,
+        **kwargs
+    ) -> "httpx.Response":
+        """
+        Make an HTTP request using the connection pool.
+        
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            url: Target URL, must be https
+            headers: Optional headers dict
+            json: JSON payload for POST/PUT requests
+            data: Form data payload
+            params: URL parameters
+            **kwargs: Additional arguments passed to httpx
+            
+        Returns:
+            httpx.Response object
+            
+        Raises:
+            httpx.HTTPError: For connection or HTTP errors
+        """
+        self._check_url(url)
+        client = self._get_client()
+        
+        try:
+            return await client.request(
+                method=method.upper(),
+                url=url,
+                headers=headers,
+                json=json,
+                data=data,
+                params=params,
+                **kwargs
+            )
+            
+        except httpx.HTTPError as e:
+            logger.error("Request failed: %s %s - %s", method, url, e)
+            raise
+    
+    async def close(self):
+        """Close the client and its connections"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+    
+    async def __aenter__(self):
+        """Async context manager entry."""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit - close connections."""
+        await self.close()
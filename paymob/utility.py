@@ -1,5 +1,10 @@
+import re
+
 from paymob.exceptions import ValidationError
 
+# Bounded quantifiers keep matching linear, no catastrophic backtracking
+_EMAIL_RE = re.compile(r"[^@\s]{1,64}@[^@\s]{1,255}")
+
 def validate_email(email: str) -> None:
     """
     Simple email validator.
@@ -9,5 +14,6 @@ def validate_email(email: str) -> None:
     """
     err_msg = "Invalid email address"
     
-    if not email or "@" not in email or len(email) > 320:
+    # Length checked first so very long inputs never reach the regex
+    if not (email and len(email) <= 320 and _EMAIL_RE.fullmatch(email)):
         raise ValidationError(err_msg, params={"email": email})
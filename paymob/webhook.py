@@ -1,8 +1,13 @@
 # The following code will be refactored for better error handling and configurability
 
+import asyncio
+import functools
 import hmac
 import hashlib
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from typing import Any
 
 from paymob.exceptions import APIException, ValidationError
@@ -11,9 +16,65 @@ logger = logging.getLogger(__name__)
 
 PAYMOB_HMAC_SECRET_KEY = "" # Just a plcaeholder for now
 
+# Hex encoded SHA-512 digest, as Paymob sends it. Checked before bytes.fromhex,
+# which would also accept whitespace between the hex pairs
+_HEX_DIGEST = re.compile(r"[0-9a-fA-F]{128}")
+
+# Workers of the authorize_hmac_async pool, see _get_verify_pool
+_VERIFY_POOL_WORKERS = 2
+
+# Shared read-only fallback for missing nested objects
+_EMPTY = MappingProxyType({})
+
+# Fields concatenated for the HMAC, in Paymob's order, as (key, nested key or None)
+_TRANSACTION_FIELDS = (
+    ("amount_cents", None),
+    ("created_at", None),
+    ("currency", None),
+    ("error_occured", None),
+    ("has_parent_transaction", None),
+    ("id", None),
+    ("integration_id", None),
+    ("is_3d_secure", None),
+    ("is_auth", None),
+    ("is_capture", None),
+    ("is_refunded", None),
+    ("is_standalone_payment", None),
+    ("is_voided", None),
+    ("order", "id"),
+    ("owner", None),
+    ("pending", None),
+    ("source_data", "pan"),
+    ("source_data", "sub_type"),
+    ("source_data", "type"),
+    ("success", None),
+)
+_TOKEN_FIELDS = (
+    ("card_subtype", None),
+    ("created_at", None),
+    ("email", None),
+    ("id", None),
+    ("masked_pan", None),
+    ("merchant_id", None),
+    ("order_id", None),
+    ("token", None),
+)
+
 class PaymobHmacAuth:
     """Methods to Handle Paymob HMAC authorization For callbacks"""
 
+    # HMAC primed with the secret key (key pads already hashed), copied per request.
+    # Rebuilt whenever the cached secret key bytes change
+    _hmac_template: hmac.HMAC | None = None
+    _hmac_template_sk: bytes | None = None
+
+    # callback type -> name of the method that concatenates it
+    _CONCATENATORS = {
+        "subscription": "_concatenate_subscription_callback",
+        "transaction": "_concatenate_transaction_callback",
+        "token": "_concatenate_token_callback",
+    }
+
     @classmethod
     def authorize_hmac(
         cls,
@@ -28,51 +89,78 @@ class PaymobHmacAuth:
         Returns:
             The type of the callback
         logs errors if HMAC verification fails
+        ! The received hmac must be hex encoded (as Paymob sends it)
         """
         # Get hmac from either payload or query params
         # Paymob is inconsistent about that
 
-        req_hmac = query_params.get("hmac", None) if query_params else None
-        # Get request's hmac
-        if callback_data.get("hmac", None):
-            req_hmac = callback_data["hmac"]
+        req_hmac = callback_data.get("hmac") or (
+            query_params.get("hmac") if query_params else None
+        )
         if not req_hmac:
             logger.error(
-                f"Missing HMAC request received from ip: {req_ip}, \n data: {callback_data}"
+                "Missing HMAC request received from ip: %s, \n data: %s",
+                req_ip,
+                callback_data,
             )
             return
+        if not (isinstance(req_hmac, str) and _HEX_DIGEST.fullmatch(req_hmac)):
+            logger.error(
+                "Invalid HMAC received from ip: %s, \n data: %s", req_ip, callback_data
+            )
+            return
+        # Compared as raw bytes, half the size of the hex digest
+        expected_hmac = bytes.fromhex(req_hmac)
 
         # Calculate hmac
-        hmac_sk = cls._get_hmac_sk()
-        concatenated_string, res_type = cls._concatenate(callback_data)
-        logger.debug(f"Concatenated String: \n {concatenated_string}")
+        hmac_template = cls._get_hmac_template()
+        concatenated, res_type = cls._concatenate(callback_data)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Concatenated String: \n %s", concatenated.decode("utf-8"))
 
-        if (not concatenated_string) or (res_type == "undefined"):
+        if (not concatenated) or (res_type == "undefined"):
             # already logged, just return
             return
-        calculated_hmac = hmac.new(
-            hmac_sk.encode("utf-8"), concatenated_string.encode("utf-8"), hashlib.sha512
-        )
-
-        logger.debug(f"Calculated HMAC: \n {calculated_hmac.hexdigest()}")
-        logger.debug(f"Received HMAC: \n {req_hmac}")
-        # verify that both hmacs match
-        if req_hmac != calculated_hmac.hexdigest():
+        calculated_hmac = hmac_template.copy()
+        calculated_hmac.update(concatenated)
+
+        digest = calculated_hmac.digest()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Calculated HMAC: \n %s", digest.hex())
+            logger.debug("Received HMAC: \n %s", req_hmac)
+        # verify that both hmacs match, in constant time
+        if not hmac.compare_digest(expected_hmac, digest):
             logger.error(
-                f"Invalid HMAC received from ip: {req_ip}, \n data: {callback_data}"
+                "Invalid HMAC received from ip: %s, \n data: %s", req_ip, callback_data
             )
             return
 
         return res_type
 
     @classmethod
-    def _concatenate(cls, callback_data: dict[str, Any]) -> tuple[str, str]:
+    async def authorize_hmac_async(
+        cls,
+        callback_data: dict[str, Any],
+        query_params: dict[str, Any] | None,
+        req_ip: str = "unknown",
+    ) -> str | None:
+        """
+        Async variant of authorize_hmac, runs the verification on a worker thread pool
+        so the event loop keeps serving requests. Check authorize_hmac for the arguments.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_verify_pool(), cls.authorize_hmac, callback_data, query_params, req_ip
+        )
+
+    @classmethod
+    def _concatenate(cls, callback_data: dict[str, Any]) -> tuple[bytes, str]:
         """
         Concatenate the Callback data depending on Callback type \n
         Args:
             callback_data: The callback data
         Returns:
-            (concatenated_string, res_type): The concatenated string and the type of the callback
+            (concatenated, res_type): The UTF-8 concatenated bytes and the type of the callback
         """
         # idk why not just concatenate the whole data sorted! Why Paymob?!
 
@@ -80,117 +168,81 @@ class PaymobHmacAuth:
 
         callback_type = callback_type.lower()
 
-        if callback_type == "subscription":
-            return cls._concatenate_subscription_callback(callback_data), callback_type
-
-        elif callback_type == "transaction":
-            return cls._concatenate_transaction_callback(callback_data), callback_type
-
-        elif callback_type == "token":
-            return cls._concatenate_token_callback(callback_data), callback_type
+        concatenator = cls._CONCATENATORS.get(callback_type)
+        if concatenator:
+            return getattr(cls, concatenator)(callback_data), callback_type
 
         elif callback_type == "undefined":
             logger.error(
-                f"Cannot determine callback type, Ignoring ... \n data (payload): {callback_data}"
+                "Cannot determine callback type, Ignoring ... \n data (payload): %s",
+                callback_data,
             )
-            return ("", callback_type)
+            return (b"", callback_type)
         else:
             logger.error(
-                f"Unknown callback type: {callback_type}, Ignoring ... \n data (payload): {callback_data}"
+                "Unknown callback type: %s, Ignoring ... \n data (payload): %s",
+                callback_type,
+                callback_data,
             )
-            return ("", "undefined")
+            return (b"", "undefined")
 
     @staticmethod
-    def _concatenate_transaction_callback(callback_data: dict[str, Any]) -> str:
-
-        fields = [
-            "amount_cents",
-            "created_at",
-            "currency",
-            "error_occured",
-            "has_parent_transaction",
-            "id",
-            "integration_id",
-            "is_3d_secure",
-            "is_auth",
-            "is_capture",
-            "is_refunded",
-            "is_standalone_payment",
-            "is_voided",
-            "order.id",
-            "owner",
-            "pending",
-            "source_data.pan",
-            "source_data.sub_type",
-            "source_data.type",
-            "success",
-        ]
+    def _concatenate_transaction_callback(callback_data: dict[str, Any]) -> bytes:
+        return PaymobHmacAuth._concatenate_fields(callback_data, _TRANSACTION_FIELDS)
 
-        result = []
-        for field in fields:
-            # Handle nested dictionary access
-            if "." in field:
-                key1, key2 = field.split(".")
-                value = callback_data["obj"].get(key1, {}).get(key2, "")
-            else:
-                value = callback_data["obj"].get(field, "")
-
-            # Convert value to string and append to result
-            if str(value) in ["True", "False"]:
-                result.append(str(value).lower())
-            elif str(value) == "None":
-                result.append("null")
-            else:
-                result.append(str(value))
-
-        # Join all values with empty string
-        return "".join(result)
+    @staticmethod
+    def _concatenate_token_callback(callback_data: dict[str, Any]) -> bytes:
+        return PaymobHmacAuth._concatenate_fields(callback_data, _TOKEN_FIELDS)
 
     @staticmethod
-    def _concatenate_token_callback(callback_data: dict[str, Any]) -> str:
-        fields = [
-            "card_subtype",
-            "created_at",
-            "email",
-            "id",
-            "masked_pan",
-            "merchant_id",
-            "order_id",
-            "token",
-        ]
+    def _concatenate_fields(
+        callback_data: dict[str, Any], fields: tuple[tuple[str, str | None], ...]
+    ) -> bytes:
+        """
+        Concatenate the values of the given (key, nested key) fields of callback_data["obj"]
+        Returns UTF-8 bytes, ready to be fed to the HMAC
+        """
+        obj = callback_data.get("obj")
+        if not obj:
+            logger.error(
+                "Callback has no obj, Ignoring ... \n data (payload): %s", callback_data
+            )
+            return b""
 
         result = []
-        for field in fields:
+        append = result.append
+        for key1, key2 in fields:
             # Handle nested dictionary access
-            if "." in field:
-                key1, key2 = field.split(".")
-                value = callback_data["obj"].get(key1, {}).get(key2, "")
+            if key2 is None:
+                value = obj.get(key1, "")
             else:
-                value = callback_data["obj"].get(field, "")
-
-            # Convert value to string and append to result
-            if str(value) in ["True", "False"]:
-                result.append(str(value).lower())
-            elif str(value) == "None":
-                result.append("null")
+                value = (obj.get(key1) or _EMPTY).get(key2, "")
+
+            # Convert value to its JSON-like string and append to result
+            if value is True:
+                append("true")
+            elif value is False:
+                append("false")
+            elif value is None:
+                append("null")
             else:
-                result.append(str(value))
+                append(value if type(value) is str else str(value))
 
-        # Join all values with empty string
-        return "".join(result)
+        # Join and encode once in C, cheaper than encoding each value
+        return "".join(result).encode("utf-8")
 
     @staticmethod
-    def _concatenate_subscription_callback(callback_data: dict[str, Any]) -> str:
+    def _concatenate_subscription_callback(callback_data: dict[str, Any]) -> bytes:
 
         str1 = callback_data.get("trigger_type", "")
-        str2 = callback_data.get("subscription_data", {}).get("id", "")
+        str2 = (callback_data.get("subscription_data") or _EMPTY).get("id", "")
 
-        if not str1 or not str2:
+        if not (str1 and str2):
             raise ValidationError(
                 "Cannot authorize callback: Not a valid subscription callback"
             )
 
-        return "".join(str(str1) + "for" + str(str2))
+        return f"{str1}for{str2}".encode("utf-8")
 
     @staticmethod
     def _get_type_of_callback(callback_data: dict[str, Any]) -> str:
@@ -198,12 +250,34 @@ class PaymobHmacAuth:
         Returns the type of the webhook callback.
         Returns 'undefined' if unable to determine the type
         """
-        if callback_data.get("type", None):
-            return callback_data["type"]
-        if callback_data.get("subscription_data", None):
+        callback_type = callback_data.get("type")
+        if callback_type:
+            return callback_type
+        if callback_data.get("subscription_data"):
             return "subscription"
         return "undefined"
 
+    @classmethod
+    def reload_secret(cls) -> None:
+        """
+        Drop the cached HMAC secret key, so the next callback picks up the current one.
+        Call after rotating the secret key
+        """
+        _get_hmac_sk_bytes.cache_clear()
+        cls._hmac_template = None
+        cls._hmac_template_sk = None
+
+    @classmethod
+    def _get_hmac_template(cls) -> hmac.HMAC:
+        """Returns the HMAC primed with the current secret key, ready to be copied."""
+        sk = _get_hmac_sk_bytes()
+        # Identity check, the cached bytes object only changes when the cache is cleared
+        if cls._hmac_template is None or cls._hmac_template_sk is not sk:
+            _warn_if_not_openssl()
+            cls._hmac_template = hmac.new(sk, b"", hashlib.sha512)
+            cls._hmac_template_sk = sk
+        return cls._hmac_template
+
     @staticmethod
     def _get_hmac_sk() -> str:
         sk = PAYMOB_HMAC_SECRET_KEY
@@ -211,3 +285,43 @@ class PaymobHmacAuth:
             raise APIException("Paymob HMAC secret key not configured")
         return sk
 
+
+@functools.lru_cache(maxsize=1)
+def _get_hmac_sk_bytes() -> bytes:
+    """
+    The UTF-8 encoded HMAC secret key, validated and encoded once.
+    Call PaymobHmacAuth.reload_secret() after changing the secret key
+    """
+    return PaymobHmacAuth._get_hmac_sk().encode("utf-8")
+
+
+@functools.lru_cache(maxsize=1)
+def _warn_if_not_openssl() -> None:
+    """
+    Warn once if hashlib's SHA-512 isn't OpenSSL's. HMACs are computed by OpenSSL
+    (with its CPU-dispatched SHA-512) only when it is, otherwise Python falls back
+    to its builtin SHA-512. Called on first use, after the app configured logging
+    """
+    try:
+        import _hashlib  # OpenSSL bindings, missing when Python is built without it
+    except ImportError:
+        openssl_sha512 = None
+    else:
+        openssl_sha512 = getattr(_hashlib, "openssl_sha512", None)
+
+    if hashlib.sha512 is not openssl_sha512:
+        logger.warning(
+            "hashlib is not OpenSSL-backed, Paymob HMAC verification will be slower"
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_verify_pool() -> ThreadPoolExecutor:
+    """
+    Worker pool for authorize_hmac_async, created on first use.
+    Only keeps verification off the event loop: the concatenation is pure Python
+    and callback-sized HMACs hold the GIL, so more workers wouldn't add throughput
+    """
+    return ThreadPoolExecutor(
+        max_workers=_VERIFY_POOL_WORKERS, thread_name_prefix="paymob-hmac"
+    )
@@ -9,4 +9,9 @@ setup(
     description="Python SDK for Paymob payment gateway",
     license="MIT",
     license_files=["LICENSE"],
+    install_requires=["requests"],
+    extras_require={
+        # HttpxConnectionPool / AsyncConnectionPool
+        "http2": ["httpx[http2]"],
+    },
 )
\ No newline at end of file
@@ -0,0 +1,50 @@
+# Cache tests
+import time
+import unittest
+from unittest import mock
+
+from paymob.cache import MemoryCache
+
+
+class MemoryCacheTest(unittest.TestCase):
+
+    def test_get_and_expiry(self):
+        cache = MemoryCache()
+        cache.set("fresh", "value", 60)
+        cache.set("expired", "value", -1)
+
+        self.assertEqual(cache.get("fresh"), "value")
+        self.assertIsNone(cache.get("expired"))
+        self.assertNotIn("expired", cache._cache)
+
+    def test_sweep_evicts_expired_keys(self):
+        cache = MemoryCache()
+        cache.set("kept", "old", -1)
+        # Overwritten with a new TTL, its stale heap entry must not evict it
+        cache.set("kept", "new", 60)
+        for i in range(cache.SWEEP_INTERVAL + 20):
+            cache.set(f"expired{i}", "value", -1)
+
+        # Everything set before the sweep is gone, except the overwritten key
+        self.assertLess(len(cache._cache), 30)
+        self.assertLess(len(cache._expiry), 30)
+        self.assertEqual(cache.get("kept"), "new")
+
+    def test_expired_get_keeps_a_concurrent_set(self):
+        cache = MemoryCache()
+        cache.set("key", "old", -1)
+        monotonic = time.monotonic
+
+        def set_concurrently():
+            # Another thread stores a new value between get()'s read and its eviction
+            cache._cache["key"] = ("new", monotonic() + 60)
+            return monotonic()
+
+        with mock.patch("paymob.cache.time.monotonic", side_effect=set_concurrently):
+            self.assertIsNone(cache.get("key"))
+
+        self.assertEqual(cache.get("key"), "new")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1 +1,508 @@
-# Basic client tests
\ No newline at end of file
+# Basic client tests
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from paymob.auth_utility import PaymobAuth
+from paymob.cache import CachedResponse, MemoryCache
+from paymob.client import PaymobTransaction, _add_subscription_start_date
+from paymob.config import PaymobConfig
+from paymob.connection import AsyncConnectionPool, ConnectionPool, HttpxConnectionPool
+from paymob.exceptions import ConfigurationError, ValidationError
+
+# httpx and h2 come with the optional http2 extra
+try:
+    import h2  # noqa: F401
+    import httpx
+except ImportError:
+    httpx = None
+
+
+SETTLED_TRANSACTION = {"id": 1, "pending": False, "success": True}
+PENDING_TRANSACTION = {"id": 1, "pending": True, "success": False}
+
+
+def make_config(**overrides):
+    params = {
+        "api_key": "api_key",
+        "public_key": "public_key",
+        "secret_key": "secret_key",
+        "integration_id": "1",
+    }
+    params.update(overrides)
+    return PaymobConfig(**params)
+
+
+class FakeResponse:
+
+    def __init__(self, body, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(body)
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error", response=self)
+
+
+class FakePool:
+    """
+    Records requests and rejects non-https URLs like ConnectionPool.
+    Each token request gets a new token, API requests get the given responses
+    in order, then a payment intention.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.urls = []
+        self.headers = []
+        self.tokens = 0
+
+    def request(self, method, url, headers=None, **kwargs):
+        if not url.startswith("https://"):
+            raise ValueError("Only HTTPS URLs are allowed for security reasons")
+        self.urls.append(url)
+        self.headers.append(headers)
+        if url.endswith("/api/auth/tokens"):
+            self.tokens += 1
+            return FakeResponse({"token": f"token{self.tokens}"})
+        if self.responses:
+            return self.responses.pop(0)
+        return FakeResponse({"client_secret": "secret"})
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+class RecordingCache(MemoryCache):
+    """MemoryCache that records the TTL of every set."""
+
+    def __init__(self):
+        super().__init__()
+        self.ttls = []
+
+    def set(self, key, value, ttl):
+        self.ttls.append(ttl)
+        super().set(key, value, ttl)
+
+
+class ConnectionPoolUrlTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ConnectionPool()
+        self.addCleanup(self.pool.close)
+
+    def test_https_url_is_accepted(self):
+        self.pool._check_url("https://accept.paymob.com/api/auth/tokens")
+
+    def test_plain_http_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.pool._check_url("http://accept.paymob.com/api/auth/tokens")
+
+    def test_relative_path_is_rejected(self):
+        # Paths are resolved by the callers against PaymobConfig.base_url
+        with self.assertRaises(ValueError):
+            self.pool._check_url("/api/auth/tokens")
+
+
+@unittest.skipUnless(httpx, "requires the http2 extra")
+class HttpxConnectionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.requests = []
+        self.pool = HttpxConnectionPool()
+        self.pool.client.close()
+        self.pool.client = httpx.Client(transport=httpx.MockTransport(self._handle))
+        self.addCleanup(self.pool.close)
+
+    def _handle(self, request):
+        self.requests.append(request)
+        return httpx.Response(201, json={"id": 1})
+
+    def test_round_trip(self):
+        response = self.pool.post(
+            "https://accept.paymob.com/v1/intention/",
+            headers={"Authorization": "Token secret_key"},
+            json={"amount": 1000},
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"id": 1})
+        request = self.requests[0]
+        self.assertEqual(request.method, "POST")
+        self.assertEqual(str(request.url), "https://accept.paymob.com/v1/intention/")
+        self.assertEqual(request.headers["Authorization"], "Token secret_key")
+        self.assertEqual(json.loads(request.content), {"amount": 1000})
+
+    def test_plain_http_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.pool.get("http://accept.paymob.com/api/auth/tokens")
+        self.assertEqual(self.requests, [])
+
+
+class TransactionBaseUrlTest(unittest.TestCase):
+    # Regression: relative API paths used to reach the pool, which only accepts
+    # absolute https URLs, and fail with ValueError
+
+    def setUp(self):
+        self.config = make_config(base_url="https://example.paymob.com")
+        self.pool = FakePool()
+        self.transaction = PaymobTransaction(self.pool, self.config)
+
+    def test_create_payment_intent_uses_config_base_url(self):
+        self.transaction.create_payment_intent(
+            amount_cents=1000,
+            currency="EGP",
+            payment_method_ids=[1],
+            first_name="First",
+            last_name="Last",
+            email="test@example.com",
+            phone_number="+201000000000",
+        )
+        self.assertEqual(
+            self.pool.urls, ["https://example.paymob.com/v1/intention/"]
+        )
+
+    def test_get_transaction_by_id_uses_config_base_url(self):
+        self.transaction.get_transaction_by_id(5)
+        self.assertEqual(
+            self.pool.urls,
+            [
+                "https://example.paymob.com/api/auth/tokens",
+                "https://example.paymob.com/api/acceptance/transactions/5",
+            ],
+        )
+
+
+
+class PaymobAuthTest(unittest.TestCase):
+
+    def test_concurrent_get_token_requests_one_token(self):
+        auth = PaymobAuth(make_config(), FakePool())
+        request_token = auth._request_token
+        barrier = threading.Barrier(10)
+        tokens = []
+
+        def slow_request_token():
+            # Let the other threads pile up on the refresh lock
+            time.sleep(0.05)
+            return request_token()
+
+        def get_token():
+            barrier.wait()
+            tokens.append(auth.get_token())
+
+        with mock.patch.object(
+            auth, "_request_token", side_effect=slow_request_token
+        ) as mocked:
+            threads = [threading.Thread(target=get_token) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(mocked.call_count, 1)
+        self.assertEqual(tokens, ["token1"] * 10)
+
+
+class CreatePaymentIntentTest(unittest.TestCase):
+
+    def test_checkout_url(self):
+        # Regression: the checkout_url f-string was returned unformatted
+        transaction = PaymobTransaction(FakePool(), make_config())
+
+        result = transaction.create_payment_intent(
+            amount_cents=1000,
+            currency="EGP",
+            payment_method_ids=[1],
+            first_name="First",
+            last_name="Last",
+            email="test@example.com",
+            phone_number="+201000000000",
+        )
+
+        self.assertEqual(
+            result["checkout_url"],
+            "https://accept.paymob.com/unifiedcheckout/"
+            "?publicKey=public_key&clientSecret=secret",
+        )
+        self.assertEqual(result["data"], {"client_secret": "secret"})
+
+
+class SubscriptionStartDateTest(unittest.TestCase):
+
+    VALID = ("2024-01-02", "2024-02-29", "2030-12-31")
+    INVALID = (
+        "2024-1-02",  # unpadded
+        "2024-01-2",
+        "2024-02-30",  # impossible dates
+        "2023-02-29",
+        "2024-13-01",
+        "2024/01/02",
+        "02-01-2024",
+        "2024-01-02T00:00:00",
+        " 2024-01-02",
+        "2024-01-02\n",
+    )
+
+    def test_valid_dates(self):
+        for start_date in self.VALID:
+            with self.subTest(start_date=start_date):
+                payload = {}
+                _add_subscription_start_date(payload, start_date)
+                self.assertEqual(payload["subscription_start_date"], start_date)
+
+    def test_invalid_dates(self):
+        for start_date in self.INVALID:
+            with self.subTest(start_date=start_date):
+                with self.assertRaises(ValidationError):
+                    _add_subscription_start_date({}, start_date)
+
+
+class AuthedRequestTest(unittest.TestCase):
+
+    TRANSACTION_URL = "https://accept.paymob.com/api/acceptance/transactions/1"
+
+    def test_403_retries_once_with_a_refreshed_token(self):
+        pool = FakePool(FakeResponse({}, 403), FakeResponse(SETTLED_TRANSACTION))
+        transaction = PaymobTransaction(pool, make_config())
+
+        response = transaction.get_transaction_by_id(1)
+
+        self.assertEqual(response.json(), SETTLED_TRANSACTION)
+        self.assertEqual(pool.tokens, 2)
+        self.assertEqual(pool.urls.count(self.TRANSACTION_URL), 2)
+        self.assertEqual(pool.headers[-1], {"Authorization": "Bearer token2"})
+
+    def test_second_403_raises(self):
+        pool = FakePool(FakeResponse({}, 403), FakeResponse({}, 403))
+        transaction = PaymobTransaction(pool, make_config())
+
+        with self.assertRaises(requests.HTTPError):
+            transaction.get_transaction_by_id(1)
+        self.assertEqual(pool.urls.count(self.TRANSACTION_URL), 2)
+
+
+class TransactionRefCacheTest(unittest.TestCase):
+
+    INQUIRY_URL = "https://accept.paymob.com/api/ecommerce/orders/transaction_inquiry"
+
+    def _transaction(self, *responses, api_key="api_key"):
+        pool = FakePool(*responses)
+        return PaymobTransaction(pool, make_config(api_key=api_key)), pool
+
+    def _inquiries(self, pool):
+        return pool.urls.count(self.INQUIRY_URL)
+
+    def test_miss_then_hit(self):
+        transaction, pool = self._transaction(FakeResponse(SETTLED_TRANSACTION))
+
+        first = transaction.get_transaction_by_ref("ref")
+        second = transaction.get_transaction_by_ref("ref")
+
+        self.assertIsInstance(first, FakeResponse)
+        self.assertIsInstance(second, CachedResponse)
+        self.assertEqual(second.json(), SETTLED_TRANSACTION)
+        self.assertEqual(self._inquiries(pool), 1)
+
+    def test_other_ref_is_a_miss(self):
+        transaction, pool = self._transaction(
+            FakeResponse(SETTLED_TRANSACTION), FakeResponse(SETTLED_TRANSACTION)
+        )
+
+        transaction.get_transaction_by_ref("ref")
+        transaction.get_transaction_by_ref("other_ref")
+
+        self.assertEqual(self._inquiries(pool), 2)
+
+    def test_pending_transaction_is_not_cached(self):
+        transaction, pool = self._transaction(
+            FakeResponse(PENDING_TRANSACTION), FakeResponse(SETTLED_TRANSACTION)
+        )
+
+        transaction.get_transaction_by_ref("ref")
+        response = transaction.get_transaction_by_ref("ref")
+
+        self.assertEqual(response.json(), SETTLED_TRANSACTION)
+        self.assertEqual(self._inquiries(pool), 2)
+
+    def test_cache_is_scoped_per_account(self):
+        first, _ = self._transaction(FakeResponse(SETTLED_TRANSACTION))
+        second, pool = self._transaction(
+            FakeResponse(PENDING_TRANSACTION), api_key="other_api_key"
+        )
+        # Accounts sharing a cache backend, e.g. one Redis
+        second.cache_backend = first.cache_backend
+
+        first.get_transaction_by_ref("ref")
+        response = second.get_transaction_by_ref("ref")
+
+        self.assertEqual(response.json(), PENDING_TRANSACTION)
+        self.assertEqual(self._inquiries(pool), 1)
+        self.assertNotEqual(
+            first._transaction_ref_cache_key("ref"),
+            second._transaction_ref_cache_key("ref"),
+        )
+
+    def test_ttl_is_jittered(self):
+        refs = [f"ref{i}" for i in range(50)]
+        transaction, _ = self._transaction(
+            *(FakeResponse(SETTLED_TRANSACTION) for _ in refs)
+        )
+        cache = transaction.cache_backend = RecordingCache()
+
+        for ref in refs:
+            transaction.get_transaction_by_ref(ref)
+
+        ttls = cache.ttls
+        self.assertEqual(len(ttls), len(refs))
+        self.assertTrue(all(110 <= ttl <= 130 for ttl in ttls))
+        self.assertGreater(len(set(ttls)), 1)
+
+    def test_cached_response_mimics_requests_response(self):
+        transaction, _ = self._transaction(FakeResponse(SETTLED_TRANSACTION))
+        transaction.get_transaction_by_ref("ref")
+
+        response = transaction.get_transaction_by_ref("ref")
+
+        self.assertTrue(response.ok)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, json.dumps(SETTLED_TRANSACTION).encode())
+        self.assertEqual(response.headers["content-type"], "application/json")
+        response.raise_for_status()
+
+
+
+class ThreadRecordingCache(MemoryCache):
+    """MemoryCache that records the threads it is called from."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value, ttl):
+        self.threads.add(threading.get_ident())
+        super().set(key, value, ttl)
+
+
+@unittest.skipUnless(httpx, "requires the http2 extra")
+class AsyncTransactionTest(unittest.IsolatedAsyncioTestCase):
+
+    API_URL = "https://accept.paymob.com/api/"
+
+    def setUp(self):
+        # API responses in order, after that a payment intention
+        self.responses = []
+        self.api_requests = []
+        self.token_requests = 0
+
+        # Built outside the event loop, loading the SSL context is slow
+        self.pool = AsyncConnectionPool()
+        self.transaction = PaymobTransaction(None, make_config(), self.pool)
+
+    async def asyncSetUp(self):
+        await self.pool.client.aclose()
+        self.pool.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(self._handle)
+        )
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def _handle(self, request):
+        if request.url.path == "/api/auth/tokens":
+            self.token_requests += 1
+            token = f"token{self.token_requests}"
+            # Let concurrent callers pile up while the token is in flight
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"token": token})
+
+        self.api_requests.append(request)
+        if self.responses:
+            status_code, body = self.responses.pop(0)
+            return httpx.Response(status_code, json=body)
+        return httpx.Response(201, json={"client_secret": "secret"})
+
+    async def test_concurrent_get_token_requests_one_token(self):
+        auth = self.transaction.async_auth
+
+        tokens = await asyncio.gather(*(auth.get_token() for _ in range(10)))
+
+        self.assertEqual(tokens, ["token1"] * 10)
+        self.assertEqual(self.token_requests, 1)
+
+    async def test_authed_request_retries_once_on_403(self):
+        self.responses = [(403, {}), (200, SETTLED_TRANSACTION)]
+
+        response = await self.transaction.get_transaction_by_id_async(1)
+
+        self.assertEqual(response.json(), SETTLED_TRANSACTION)
+        self.assertEqual(self.token_requests, 2)
+        self.assertEqual(len(self.api_requests), 2)
+        self.assertEqual(
+            self.api_requests[1].headers["Authorization"], "Bearer token2"
+        )
+
+    async def test_authed_request_raises_on_second_403(self):
+        self.responses = [(403, {}), (403, {})]
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.transaction.get_transaction_by_id_async(1)
+        self.assertEqual(len(self.api_requests), 2)
+
+    async def test_get_transaction_by_ref_cache_hit(self):
+        self.responses = [(200, SETTLED_TRANSACTION)]
+
+        await self.transaction.get_transaction_by_ref_async("ref")
+        response = await self.transaction.get_transaction_by_ref_async("ref")
+
+        self.assertIsInstance(response, CachedResponse)
+        self.assertEqual(response.json(), SETTLED_TRANSACTION)
+        self.assertEqual(len(self.api_requests), 1)
+
+    async def test_cache_backend_runs_off_the_event_loop(self):
+        cache = self.transaction.async_auth.cache_backend = ThreadRecordingCache()
+        self.transaction.cache_backend = cache
+        self.responses = [(200, SETTLED_TRANSACTION)]
+
+        await self.transaction.get_transaction_by_ref_async("ref")
+        await self.transaction.get_transaction_by_ref_async("ref")
+
+        self.assertTrue(cache.threads)
+        self.assertNotIn(threading.get_ident(), cache.threads)
+
+    async def test_create_payment_intent(self):
+        result = await self.transaction.create_payment_intent_async(
+            amount_cents=1000,
+            currency="EGP",
+            payment_method_ids=[1],
+            first_name="First",
+            last_name="Last",
+            email="test@example.com",
+            phone_number="+201000000000",
+        )
+
+        self.assertEqual(result["data"], {"client_secret": "secret"})
+        self.assertEqual(
+            str(self.api_requests[0].url), "https://accept.paymob.com/v1/intention/"
+        )
+
+    async def test_sync_methods_require_connection_pool(self):
+        with self.assertRaises(ConfigurationError):
+            self.transaction.get_transaction_by_id(1)
+
+
+if __name__ == "__main__":
+    unittest.main()
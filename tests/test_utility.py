@@ -0,0 +1,44 @@
+# Utility tests
+import unittest
+
+from paymob.exceptions import ValidationError
+from paymob.utility import validate_email
+
+
+class ValidateEmailTest(unittest.TestCase):
+
+    VALID = (
+        "test@example.com",
+        "first.last+tag@sub.example.co",
+        "a@b",
+        "a" * 64 + "@example.com",
+    )
+    INVALID = (
+        "",
+        "test",
+        "@example.com",
+        "test@",
+        "te st@example.com",  # whitespace
+        "test@exam ple.com",
+        " test@example.com",
+        "test@example.com\n",
+        "test@@example.com",  # multiple @
+        "test@example@com",
+        "a" * 65 + "@example.com",  # local part over 64 characters
+        "a@" + "b" * 256,  # domain over 255 characters
+    )
+
+    def test_valid_emails(self):
+        for email in self.VALID:
+            with self.subTest(email=email):
+                validate_email(email)
+
+    def test_invalid_emails(self):
+        for email in self.INVALID:
+            with self.subTest(email=email):
+                with self.assertRaises(ValidationError):
+                    validate_email(email)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1 +1,120 @@
-# HMAC tests
\ No newline at end of file
+# HMAC tests
+import asyncio
+import hashlib
+import hmac
+import unittest
+
+import paymob.webhook
+from paymob.webhook import PaymobHmacAuth
+
+SECRET_KEY = "secret_key"
+
+
+def sign(message, key=SECRET_KEY):
+    return hmac.new(key.encode(), message.encode(), hashlib.sha512).hexdigest()
+
+
+class ConcatenateTransactionCallbackTest(unittest.TestCase):
+
+    def _concatenate(self, **obj):
+        return PaymobHmacAuth._concatenate_transaction_callback({"obj": obj})
+
+    def test_booleans_and_none(self):
+        self.assertEqual(
+            self._concatenate(is_auth=True, is_capture=False, pending=None),
+            b"truefalsenull",
+        )
+
+    def test_bool_like_int_is_not_a_boolean(self):
+        # 1 == True, but must be hashed as "1", not "true"
+        self.assertEqual(self._concatenate(amount_cents=1, success=0), b"10")
+
+    def test_missing_fields_are_empty(self):
+        self.assertEqual(
+            self._concatenate(order={"id": 5}, source_data={"type": "card"}),
+            b"5card",
+        )
+
+
+
+class AuthorizeHmacTest(unittest.TestCase):
+
+    TRANSACTION = {
+        "type": "TRANSACTION",
+        "obj": {"amount_cents": 100, "order": {"id": 7}, "success": True},
+    }
+
+    def setUp(self):
+        self._original_key = paymob.webhook.PAYMOB_HMAC_SECRET_KEY
+        paymob.webhook.PAYMOB_HMAC_SECRET_KEY = SECRET_KEY
+        PaymobHmacAuth.reload_secret()
+
+    def tearDown(self):
+        paymob.webhook.PAYMOB_HMAC_SECRET_KEY = self._original_key
+        PaymobHmacAuth.reload_secret()
+
+    def _authorize(self, callback_data, query_params=None):
+        return PaymobHmacAuth.authorize_hmac(callback_data, query_params)
+
+    def _assert_rejected(self, callback_data, query_params=None):
+        with self.assertLogs("paymob.webhook", "ERROR"):
+            self.assertIsNone(self._authorize(callback_data, query_params))
+
+    def test_transaction_callback(self):
+        # Transaction signatures come in the query params
+        query_params = {"hmac": sign("1007true")}
+        self.assertEqual(self._authorize(self.TRANSACTION, query_params), "transaction")
+
+    def test_token_callback(self):
+        callback = {"type": "TOKEN", "obj": {"id": 3, "token": "abc"}}
+        callback["hmac"] = sign("3abc")
+        self.assertEqual(self._authorize(callback), "token")
+
+    def test_subscription_callback(self):
+        callback = {"trigger_type": "suspended", "subscription_data": {"id": 9}}
+        callback["hmac"] = sign("suspendedfor9")
+        self.assertEqual(self._authorize(callback), "subscription")
+
+    def test_wrong_hmac(self):
+        self._assert_rejected(self.TRANSACTION, {"hmac": sign("1007false")})
+
+    def test_non_hex_hmac(self):
+        self._assert_rejected(self.TRANSACTION, {"hmac": "zz" * 64})
+
+    def test_hmac_with_whitespace(self):
+        # bytes.fromhex would accept this
+        hmac_with_spaces = " ".join(sign("1007true")[i:i + 2] for i in range(0, 128, 2))
+        self._assert_rejected(self.TRANSACTION, {"hmac": hmac_with_spaces})
+
+    def test_missing_hmac(self):
+        self._assert_rejected(self.TRANSACTION, None)
+
+    def test_callback_without_obj(self):
+        self._assert_rejected({"type": "TRANSACTION"}, {"hmac": sign("")})
+
+    def test_reload_secret_picks_up_rotated_key(self):
+        query_params = {"hmac": sign("1007true", key="rotated_key")}
+        self._assert_rejected(self.TRANSACTION, query_params)
+
+        paymob.webhook.PAYMOB_HMAC_SECRET_KEY = "rotated_key"
+        PaymobHmacAuth.reload_secret()
+        self.assertEqual(self._authorize(self.TRANSACTION, query_params), "transaction")
+
+    def test_authorize_hmac_async(self):
+        valid = {"hmac": sign("1007true")}
+        self.assertEqual(
+            asyncio.run(PaymobHmacAuth.authorize_hmac_async(self.TRANSACTION, valid)),
+            "transaction",
+        )
+
+        invalid = {"hmac": sign("1007false")}
+        with self.assertLogs("paymob.webhook", "ERROR"):
+            self.assertIsNone(
+                asyncio.run(
+                    PaymobHmacAuth.authorize_hmac_async(self.TRANSACTION, invalid)
+                )
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()